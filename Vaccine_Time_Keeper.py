@@ -1,7 +1,7 @@
 import sqlite3 as sql, tkinter as tk
 from tkinter import ttk
-from tkinter.filedialog import asksaveasfile
-import re
+from tkinter.filedialog import asksaveasfile, askopenfilenames
+import re, uuid, os
 from datetime import timedelta, datetime, time, date
 from functools import partial
 
@@ -26,6 +26,11 @@ class Application(tk.Frame):
 		self.pack()
 		self.build_page()
 
+		# Closes any shifts left open from previous days at the close time and lets the user know which were closed
+		closed, discarded = self.database.close_stale_shifts(date.today(), self.database.get_config()['close_time'])
+		if len(closed) + len(discarded) > 0:
+			self.report_closed_shifts(closed, discarded)
+
 		# Applies the menu created in build_page to the menu bar
 		self.root.config(menu = self.menu_bar)
 
@@ -45,7 +50,8 @@ class Application(tk.Frame):
 				3) A set of spinboxs to select the hour and minutes of the check in
 				4) A set of spinboxs to select the hour and minutes of the check out
 				5) A button to check in
-				6) A menu at the top with
+				6) Buttons to clock in and clock out at the current time
+				7) A menu at the top with
 					a) option to add a user
 					b) option to save the database
 					c) option to remove a user ***
@@ -69,9 +75,11 @@ class Application(tk.Frame):
 		self.time_frame = tk.Frame(self)
 		self.time_frame.grid(row = 2, column = 0, sticky = 'w')
 
-		# Creates the two sets of spinboxs, one for the in time and one for the out time.
-		self.in_time = Time_Entry(self.time_frame, row = 0, column = 0, title = "In", padding = (5,27))
-		self.out_time = Time_Entry(self.time_frame, row = 0, column = 3, title = "Out", padding = (50,5))
+		# Creates the two sets of spinboxs, one for the in time and one for the out time,
+		# using the hours and minutes from the cached database configuration
+		config = self.database.get_config()
+		self.in_time = Time_Entry(self.time_frame, row = 0, column = 0, title = "In", hours = config['hours'], minutes = config['minutes'], padding = (5,27))
+		self.out_time = Time_Entry(self.time_frame, row = 0, column = 3, title = "Out", hours = config['hours'], minutes = config['minutes'], padding = (50,5))
 
 		# Sets up the check-in button - the button is initially disabled until a name is selected
 		self.button_frame = tk.Frame(self)
@@ -80,6 +88,15 @@ class Application(tk.Frame):
 		self.check_in_button.grid(row = 0, column = 0, pady = 5)
 		self.check_in_button.configure(state = 'disabled')
 
+		# Sets up the clock-in and clock-out buttons - only the button matching the selected users
+		# open shift is enabled once a name is selected
+		self.clock_in_button = tk.Button(self.button_frame, text = "Clock In", width = 20, command = self.clock_in)
+		self.clock_in_button.grid(row = 1, column = 0, pady = 5)
+		self.clock_in_button.configure(state = 'disabled')
+		self.clock_out_button = tk.Button(self.button_frame, text = "Clock Out", width = 20, command = self.clock_out)
+		self.clock_out_button.grid(row = 2, column = 0, pady = 5)
+		self.clock_out_button.configure(state = 'disabled')
+
 	def build_menu(self):
 		''' builds the menu bar for the application and adds all the options to the bar'''
 
@@ -96,6 +113,12 @@ class Application(tk.Frame):
 		self.file_menu.add_command(label = "Activate User", command = partial(self.change_user_status, 1))
 		self.file_menu.add_command(label = "Deactivate User", command = partial(self.change_user_status, 0))
 		self.file_menu.add_command(label = "Export Time Data", command = self.database.export_time)
+		self.file_menu.add_command(label = "On Site", command = self.on_site_window)
+		self.file_menu.add_command(label = "Close Open Shifts", command = self.close_open_shifts)
+		self.file_menu.add_command(label = "Audit Overlapping Shifts", command = self.database.export_overlaps)
+		self.file_menu.add_command(label = "Settings", command = self.settings_window)
+		self.file_menu.add_command(label = "Merge Site Logs", command = self.merge_site_logs)
+		self.file_menu.add_command(label = "Export County Totals", command = self.export_county_totals)
 
 		# Names the cascade 'File' and and adds it to the menu bar
 		self.menu_bar.add_cascade(label = "File", menu=self.file_menu)
@@ -128,6 +151,121 @@ class Application(tk.Frame):
 		self.out_time.enable()
 		self.check_in_button.configure(state = 'normal')
 
+		# Enables clock out if the user has an open shift, otherwise enables clock in
+		table_name = self.get_table_name(self.name_selection.get(), self.users)
+		if self.database.get_open_shift(table_name) is None:
+			self.clock_in_button.configure(state = 'normal')
+			self.clock_out_button.configure(state = 'disabled')
+		else:
+			self.clock_in_button.configure(state = 'disabled')
+			self.clock_out_button.configure(state = 'normal')
+
+	def get_table_name(self, name, user_list):
+		''' Takes a label and a list of user objects and returns the table name of the user with that label'''
+
+		for i in user_list:
+			if name == i.get_label():
+				return i.get_table_name()
+
+	def clock_in(self):
+		''' This runs when the clock-in button is pressed
+			opens a shift for the selected user starting at the current time'''
+
+		table_name = self.get_table_name(self.name_selection.get(), self.users)
+
+		# Calls the database.clock_in function with the current date and time
+		if self.database.clock_in(table_name, date.today(), datetime.now().time().isoformat('minutes')):
+			self.reset_form()
+			self.error_window("Clocked In", "")
+		else:
+			self.error_window("Already clocked in or a shift is logged after this time")
+
+	def clock_out(self):
+		''' This runs when the clock-out button is pressed
+			closes the open shift for the selected user at the current time'''
+
+		self.close_shift(self.get_table_name(self.name_selection.get(), self.users))
+
+	def close_shift(self, table_name):
+		''' Takes the table name of a user and closes their open shift at the current time.
+			Used by the clock-out button and the on site window'''
+
+		open_shift = self.database.get_open_shift(table_name)
+
+		# Checks that the user has an open shift to close
+		if open_shift is None:
+			self.error_window("Not clocked in")
+
+		# Calls the database.clock_out function with the current date and time
+		elif self.database.clock_out(table_name, date.today(), datetime.now().time().isoformat('minutes'), self.database.get_config()['close_time']):
+			self.reset_form()
+
+		# Lets the user know if the shift was from an earlier day and was closed at the end of that day
+			if open_shift[0] != "{}".format(date.today()):
+				self.error_window("Clocked Out\nShift from {} closed at {}".format(open_shift[0], self.database.get_config()['close_time']), "")
+			else:
+				self.error_window("Clocked Out", "")
+		else:
+			self.error_window("Shift overlaps an existing entry")
+
+	def on_site_window(self):
+		''' Creates a pop-out window listing the users currently clocked in
+				This window has:
+					1) A dropdown selection of the users on site
+					2) A button to clock out the selected user'''
+
+		# Creates the pop-out window
+		self.on_site = tk.Toplevel()
+		self.on_site.title("On Site")
+
+		# Creates a frame to hold the widgets
+		entry_frame = tk.Frame(self.on_site)
+		entry_frame.grid(row = 0, column = 0)
+
+		# Creates the dropdown and populates it with the users that have an open shift
+		self.on_site_selection = Drop_Down_Selection(container = entry_frame, row = 0, title = "On Site", func = lambda event: None)
+		self.on_site_list = self.database.get_open_shifts()
+		self.on_site_selection.update_values([i.get_label() for i in self.on_site_list])
+
+		# Creates a button to clock out the selected user
+		tk.Button(entry_frame, text = "Clock Out", width = 20, command = self.on_site_clock_out).grid(row = 1, columnspan = 2, column = 0, pady = 5)
+
+	def on_site_clock_out(self):
+		''' Called when the clock out button is pressed on the on site window. Closes the selected users shift'''
+
+		name = self.on_site_selection.get()
+
+		# Checks that a name was selected
+		if name != "":
+			self.close_shift(self.get_table_name(name, self.on_site_list))
+			self.on_site.destroy()
+
+	def close_open_shifts(self):
+		''' Calls the database.close_open_shifts function to close every open shift at the end of the day
+			and notifies the user of the shifts closed'''
+
+		# Closes the shifts from earlier days at the close time, and the shifts opened today at the
+		# current time or the close time, whichever is earlier
+		closed, discarded = self.database.close_open_shifts(date.today(), datetime.now().time().isoformat('minutes'), self.database.get_config()['close_time'])
+		self.report_closed_shifts(closed, discarded)
+
+	def report_closed_shifts(self, closed, discarded):
+		''' Takes the lists of shifts closed and discarded by the database and notifies the user of each of them
+			so hours logged by a sweep can be checked'''
+
+		# Creates a line for each shift with the users name, date, in and out time
+		message = "Closed {} open shift{}".format(len(closed), "" if len(closed) == 1 else "s")
+		for last_name, first_name, work_date, in_time, out_time in closed:
+			message += "\n{}, {}  {}  {}-{}".format(last_name, first_name, work_date, in_time, out_time)
+
+		# Adds the shifts that were discarded because they overlap a logged shift
+		if len(discarded) > 0:
+			message += "\n\nDiscarded {} shift{} overlapping a logged shift".format(len(discarded), "" if len(discarded) == 1 else "s")
+			for last_name, first_name, work_date, in_time, out_time in discarded:
+				message += "\n{}, {}  {}  {}-{}".format(last_name, first_name, work_date, in_time, out_time)
+
+		self.error_window(message, "Open Shifts")
+
 	def check_in(self):
 		''' This runs when the check-in button is pressed
 			checks that the entered times denote a positive time frame and if so
@@ -159,12 +297,15 @@ class Application(tk.Frame):
 					break
 
 		# Calls the database.check-in function to log the date, in time,
-		#	and out time to the table_name for that user
-			self.database.check_in(table_name, date.today(), in_time.isoformat('minutes'), out_time.isoformat('minutes'))
+		#	and out time to the table_name for that user. If the shift overlaps one already logged
+		#	for the user it is not logged and the user is notified
+			if not self.database.check_in(table_name, date.today(), in_time.isoformat('minutes'), out_time.isoformat('minutes')):
+				self.error_window("Shift overlaps an existing entry or the open shift")
 
-		# Resets the information in the form and notifies the user that they have been checked in
-			self.reset_form()
-			self.error_window("Checked In", "")
+		# Otherwise, resets the information in the form and notifies the user that they have been checked in
+			else:
+				self.reset_form()
+				self.error_window("Checked In", "")
 
 	def reset_database(self):
 		''' This function allows the user to reset the database. Calls the database.clear_database function '''
@@ -208,7 +349,7 @@ class Application(tk.Frame):
 		# Creates a variable and the combobox for the role, populates the combobox with all possible roles
 		self.new_user_role_variable = tk.StringVar()
 		self.new_user_role = ttk.Combobox(self.entry_frame, textvariable = self.new_user_role_variable, width = 33)
-		self.new_user_role['values'] = ['OMS', 'Staff', 'Public Health Services', 'Volunteer']
+		self.new_user_role['values'] = self.database.get_config()['roles']
 
 		# Creates two entry widgets for the email and phone number
 		self.new_user_email = tk.Entry(self.entry_frame, width = 35)
@@ -282,10 +423,10 @@ class Application(tk.Frame):
 					4) An entry box for the email
 					5) An entry box for the phone number
 					6) A button to find the user
-					7) A dropdown selection for the filtered users
+					7) A scrolling list of the filtered users
 					8) A button to activate/ deactivate the selected user
-			Any amount of information can be entered to help filter the user. The user selection
-			dropdown loads with all relevant users'''
+			Any amount of information can be entered to help filter the user. The user list
+			loads the relevant users a page at a time as it is scrolled'''
 
 		# Checks to see if the status is 1 to activate users, sets the status_filter to 0 to select all
 		# deactivated users. otherwise sets to 1 to find all activated users when trying to deactivate
@@ -317,7 +458,7 @@ class Application(tk.Frame):
 		# Creates the variable and combobox for the roles, populates the roles with all possible options
 		self.user_status_role_variable = tk.StringVar()
 		self.user_status_role = ttk.Combobox(entry_frame, textvariable = self.user_status_role_variable, width = 33)
-		self.user_status_role['values'] = ['OMS', 'Staff', 'Public Health Services', 'Volunteer']
+		self.user_status_role['values'] = self.database.get_config()['roles']
 
 		# Creates two entry boxes for the email and phone number
 		self.user_status_email = tk.Entry(entry_frame, width = 35)
@@ -333,14 +474,8 @@ class Application(tk.Frame):
 		# Creates a button to call the find_user function to retrieve the filters and update the list of users
 		tk.Button(entry_frame, text = "Find user", width = 20, command = partial(self.find_user, status_filter)).grid(row = 5, columnspan = 3, column = 0, pady = 5)
 
-		# Creates the variable and combobox for the list of users.
-		self.user_status_selection_variable = tk.StringVar()
-		self.user_status_selection = ttk.Combobox(entry_frame, textvariable = self.user_status_selection_variable, width = 33)
-
-		# Sets the values of the dropdown selection as the list of all activated/ deactivated users
-		self.user_status_list = self.database.get_names("status = {}".format(status_filter))
-		self.user_status_selection['values'] = [i.get_label() for i in self.user_status_list]
-		self.user_status_selection.grid(row = 7, columnspan = 2, column = 1, pady = 5)
+		# Creates the list of users, which fetches the activated/ deactivated users a page at a time
+		self.user_status_selection = Virtual_List(entry_frame, row = 7, column = 1, fetch = partial(self.database.get_names_page, "status = {}".format(status_filter)))
 
 		# Creates a button to run the execute_status_change function to update the user status
 		tk.Button(entry_frame, text = title, width = 20, command = partial(self.execute_status_change, status)).grid(row = 8, columnspan = 3, column = 0, pady = 5)
@@ -370,33 +505,22 @@ class Application(tk.Frame):
 		# Removes the padded space that will be at the end
 		filter = filter.strip(" ")
 
-		# Passes the filter to database.filter_users, and retrieves the filtered list
-		self.user_status_list = self.database.get_names(filter)
-
-		# Updates the user selection  dropdown on the status update window with the list of filtered users
-		self.user_status_selection['values'] = [i.get_label() for i in self.user_status_list]
+		# Resets the user list on the status update window to fetch the filtered users
+		self.user_status_selection.reset(partial(self.database.get_names_page, filter))
 
 	def execute_status_change(self, status):
 		''' Called when the activate user/ deactivate user button is pressed on the change_user_status_window
 			takes the status to change the user to, gets the user and compares them to the list of users and
 			calls the database.update_status function to update the user'''
 
-		# Retrieves the name from the dropdown selection
-		name = self.user_status_selection.get()
+		# Retrieves the selected user from the user list
+		user = self.user_status_selection.get_selected()
 
-		# Checks that a name was selected
-		if name != "":
-
-			# Checks the name against the labels in the stored user list (unique to the user status window)
-			for i in self.user_status_list:
-
-			# If the name matches the label, retrieves the table name and breaks the loop
-				if name == i.get_label():
-					table_name = i.get_table_name()
-					break
+		# Checks that a user was selected
+		if user is not None:
 
 			# Calls the database.update_status function with the table name and the status to update the user
-			self.database.update_status(table_name, status)
+			self.database.update_status(user.get_table_name(), status)
 
 			# Destroys the change_user_status_window
 			self.user_status_window.destroy()
@@ -404,6 +528,118 @@ class Application(tk.Frame):
 			# Updates the list of roles in the dropdown selection
 			self.get_roles()
 
+	def settings_window(self):
+		''' Creates a pop-out window for the user to change the configuration stored in the database
+				This window has:
+					1) An entry box for the comma separated list of roles
+					2) A spinbox to select the first hour shown in the time entry spinboxes
+					3) A dropdown selection for the minute increments of the time entry spinboxes
+					4) An entry box for the site name used in merged reports
+					5) A pair of spinboxes to select the close time used to close open shifts at the end of the day
+					6) A button to save the settings'''
+
+		config = self.database.get_config()
+
+		# Creates the pop-out window
+		self.settings = tk.Toplevel()
+		self.settings.title("Settings")
+
+		# Creates a frame to house the entry widgets
+		entry_frame = tk.Frame(self.settings)
+		entry_frame.grid(row = 0, column = 0)
+
+		# Creates all the labels for the entry widgets
+		tk.Label(entry_frame, text = "Roles (Comma Separated)").grid(row = 0, column = 0, padx = 5, stick = "w")
+		tk.Label(entry_frame, text = "First Hour").grid(row = 1, column = 0, padx = 5, stick = "w")
+		tk.Label(entry_frame, text = "Minute Increment").grid(row = 2, column = 0, padx = 5, stick = "w")
+		tk.Label(entry_frame, text = "Site Name").grid(row = 3, column = 0, padx = 5, stick = "w")
+		tk.Label(entry_frame, text = "Close Time").grid(row = 4, column = 0, padx = 5, stick = "w")
+
+		# Creates the entry box for the roles and fills it with the current roles
+		self.settings_roles = tk.Entry(entry_frame, width = 35)
+		self.settings_roles.insert(0, ", ".join(config['roles']))
+
+		# Creates the spinbox for the first hour, starting at the current first hour. It is read only so only listed hours can be chosen
+		self.settings_start_hour = tk.Spinbox(entry_frame, values = config['hours'], wrap = True, width = 3, state = 'readonly')
+
+		# Creates the combobox for the minute increments, limited to increments that divide an hour evenly
+		self.settings_minute_step = ttk.Combobox(entry_frame, values = ['1', '5', '10', '15', '20', '30'], width = 33, state = 'readonly')
+		self.settings_minute_step.set(config['minute_step'])
+
+		# Creates the entry box for the site name and fills it with the current site name
+		self.settings_site_name = tk.Entry(entry_frame, width = 35)
+		self.settings_site_name.insert(0, config['site_name'])
+
+		# Creates the spinboxes for the close time, starting at the current close time. They are read only so
+		# only valid times can be chosen
+		close_hour, close_minute = [int(i) for i in config['close_time'].split(":")]
+		close_frame = tk.Frame(entry_frame)
+		self.settings_close_hour = tk.Spinbox(close_frame, values = ['{:02}'.format((close_hour + i) % 24) for i in range(24)], wrap = True, width = 3, state = 'readonly')
+		self.settings_close_minute = tk.Spinbox(close_frame, values = ['{:02}'.format((close_minute + i) % 60) for i in range(60)], wrap = True, width = 3, state = 'readonly')
+		self.settings_close_hour.grid(row = 0, column = 0)
+		self.settings_close_minute.grid(row = 0, column = 1)
+
+		# Places the widgets on the grid
+		self.settings_roles.grid(row = 0, columnspan = 2, column = 1, pady = 5)
+		self.settings_start_hour.grid(row = 1, column = 1, pady = 5, stick = "w")
+		self.settings_minute_step.grid(row = 2, columnspan = 2, column = 1, pady = 5)
+		self.settings_site_name.grid(row = 3, columnspan = 2, column = 1, pady = 5)
+		close_frame.grid(row = 4, column = 1, pady = 5, stick = "w")
+
+		# Creates a button to run the save_settings function
+		tk.Button(entry_frame, text = "Save", width = 20, command = self.save_settings).grid(row = 5, columnspan = 3, column = 0, pady = 5)
+
+	def save_settings(self):
+		''' Called when the save button is pressed on the settings window. Retrieves the settings and
+			calls the database.update_config function before rebuilding the form with the new settings'''
+
+		# Retrieves the list of roles, dropping any empty entries
+		roles = [i.strip() for i in self.clean_input(self.settings_roles.get()).split(",") if i.strip() != ""]
+
+		# Checks that at least one role was given
+		if len(roles) == 0:
+			self.error_window("Please Enter At Least One Role")
+
+		# Otherwise, updates the configuration, closes the window and rebuilds the form
+		else:
+			self.database.update_config(roles, int(self.settings_start_hour.get()), int(self.settings_minute_step.get()), self.clean_input(self.settings_site_name.get()).strip(),
+										'{}:{}'.format(self.settings_close_hour.get(), self.settings_close_minute.get()))
+			self.settings.destroy()
+			self.reset_form()
+
+	def merge_site_logs(self):
+		''' Asks for the site databases to merge and calls the rollup.merge function for each of them
+			to copy their new shifts into the rollup database, then notifies the user of the number of shifts copied'''
+
+		# Asks for the site databases to merge
+		paths = askopenfilenames(title = "Select Site Logs")
+
+		# Saves this sites database so its latest shifts are included if it is merged
+		self.database.save()
+
+		rollup = Time_Log_Rollup()
+		copied = 0
+		skipped = 0
+
+		# Merges each of the site databases, counting the files that are not site databases or have no site id
+		for path in paths:
+			merged = rollup.merge(path)
+			if merged is None:
+				skipped += 1
+			else:
+				copied += merged
+
+		rollup.close()
+
+		self.error_window("Merged {} new shift{}{}".format(copied, "" if copied == 1 else "s", "\n{} file{} could not be merged".format(skipped, "" if skipped == 1 else "s") if skipped > 0 else ""), "")
+
+	def export_county_totals(self):
+		''' Calls the rollup.export_totals function to export the hours for every user across all merged sites'''
+
+		rollup = Time_Log_Rollup()
+		rollup.export_totals()
+		rollup.close()
+
 	def clean_input(self, input):
 		''' Used to do a brief sanitization of the inputs in the entry boxes
 			as a basic prevention of sql injection attacks.
@@ -440,6 +676,10 @@ class Vaccine_Time_Log():
 
 		self.conn = sql.connect("Vaccine_Time_Log")
 		self.cursor = self.conn.cursor()
+
+		# Holds the configuration once it is loaded by get_config
+		self.config = None
+
 		self.setup()
 
 	def setup(self):
@@ -450,6 +690,46 @@ class Vaccine_Time_Log():
 
 		self.cursor.execute("CREATE TABLE IF NOT EXISTS users (table_name TEXT PRIMARY KEY, last_name TEXT, first_name TEXT, status INTEGER, email TEXT, role TEXT, phone_number TEXT, life_time_total INTEGER)")
 
+		# Creates an index on the users status and name so pages of users can be read in name order
+		self.cursor.execute("CREATE INDEX IF NOT EXISTS users_status_name ON users (status, last_name, first_name, table_name)")
+
+		# Creates the open_shifts table holding one row for each user currently clocked in. The table name is the
+		# primary key so a user can only have one open shift, and the date index lets the stale shift sweep
+		# find shifts left open from previous days without scanning any of the user logs
+		self.cursor.execute("CREATE TABLE IF NOT EXISTS open_shifts (table_name TEXT PRIMARY KEY, date TEXT, in_time TEXT)")
+		self.cursor.execute("CREATE INDEX IF NOT EXISTS open_shifts_date ON open_shifts (date)")
+
+		# Creates the settings table for the time grid and the roles table for the roles that can be assigned to users
+		self.cursor.execute("CREATE TABLE IF NOT EXISTS settings (name TEXT PRIMARY KEY, value TEXT)")
+		self.cursor.execute("CREATE TABLE IF NOT EXISTS roles (position INTEGER PRIMARY KEY, role TEXT)")
+
+		# Fills in the default time grid and roles if they have not been set
+		self.cursor.executemany("INSERT OR IGNORE INTO settings (name, value) VALUES (?, ?)", [('start_hour', '8'), ('minute_step', '15'), ('close_time', '23:59')])
+		if self.cursor.execute("SELECT COUNT(*) FROM roles").fetchone()[0] == 0:
+			self.cursor.executemany("INSERT INTO roles (role) VALUES (?)", [(i,) for i in ['OMS', 'Staff', 'Public Health Services', 'Volunteer']])
+
+		# Gives the database a unique site id the first time it is set up, used to tell sites apart when merging
+		self.cursor.executemany("INSERT OR IGNORE INTO settings (name, value) VALUES (?, ?)", [('site_id', uuid.uuid4().hex), ('site_name', '')])
+
+		self.migrate()
+
+	def migrate(self, batch_size = 500):
+		''' Runs the one time updates for databases created by earlier versions of the application.
+			The updates that have been run are tracked with the database user_version'''
+
+		version = self.cursor.execute("PRAGMA user_version").fetchone()[0]
+
+		# Version 1 adds the shift index to the user tables created before the index was introduced.
+		# Commits after each batch of tables so an interrupted update keeps the indexes already created
+		if version < 1:
+			tables = self.get_user_tables()
+			for n, i in enumerate(tables):
+				self.create_shift_index(i[0])
+				if (n + 1) % batch_size == 0:
+					self.conn.commit()
+			self.cursor.execute("PRAGMA user_version = 1")
+			self.conn.commit()
+
 	def add_user(self, first_name, last_name, role, email = 'NA', phone_number = 'NA'):
 		''' Takes the first name, last name, role, email and phone number and adds them to the users table as an
 			active user. Creates a new table to log that users hours'''
@@ -495,6 +775,60 @@ class Vaccine_Time_Log():
 		''' Creates a table for the user with the title as the unique table_name of the user'''
 
 		self.cursor.execute("CREATE TABLE {} (entry INTEGER PRIMARY KEY, date TEXT, in_time TEXT, out_time TEXT)".format(table_name))
+		self.create_shift_index(table_name)
+
+	def get_user_tables(self):
+		''' Returns a list of the table names in the users table that have a log table. Users whose log table
+			could not be created (such as names with characters that are not allowed in a table name) are left out'''
+
+		return self.cursor.execute('''SELECT table_name
+										FROM users
+										WHERE table_name IN (SELECT name FROM sqlite_master WHERE type = 'table')''').fetchall()
+
+	def create_shift_index(self, table_name):
+		''' Creates an index on the date, in time and out time of the users table so overlapping
+			shifts can be found with a range lookup instead of reading the whole log'''
+
+		self.cursor.execute('CREATE INDEX IF NOT EXISTS "{0}_shifts" ON "{0}" (date, in_time, out_time)'.format(table_name))
+
+	def get_config(self):
+		''' Returns a dictionary with the list of roles, the first hour, the minute increment, the hours and
+			minutes for the time entry spinboxes, the close time for open shifts, and the site id and site name.
+			The configuration is loaded from the database the first time it is requested and cached until
+			update_config is called'''
+
+		if self.config is None:
+
+		# Retrieves the roles and the time grid settings
+			roles = [i[0] for i in self.cursor.execute("SELECT role FROM roles ORDER BY position").fetchall()]
+			settings = dict(self.cursor.execute("SELECT name, value FROM settings").fetchall())
+			start_hour = int(settings['start_hour'])
+			minute_step = int(settings['minute_step'])
+
+		# Creates the hours in military time starting at the first hour, and the minutes in the minute increments
+			self.config = {'roles': roles,
+							'start_hour': start_hour,
+							'minute_step': minute_step,
+							'hours': tuple('{:02}'.format((start_hour + i) % 24) for i in range(24)),
+							'minutes': tuple('{:02}'.format(i) for i in range(0, 60, minute_step)),
+							'close_time': settings['close_time'],
+							'site_id': settings['site_id'],
+							'site_name': settings['site_name']}
+
+		return self.config
+
+	def update_config(self, roles, start_hour, minute_step, site_name, close_time):
+		''' Takes the list of roles, the first hour, the minute increment, the site name and the close time
+			and stores them in the database. Clears the cached configuration so it is reloaded the next time it is requested'''
+
+		# Replaces the list of roles
+		self.cursor.execute("DELETE FROM roles")
+		self.cursor.executemany("INSERT INTO roles (role) VALUES (?)", [(i,) for i in roles])
+
+		# Updates the time grid settings
+		self.cursor.executemany("UPDATE settings SET value = ? WHERE name = ?", [(str(start_hour), 'start_hour'), (str(minute_step), 'minute_step'), (site_name, 'site_name'), (close_time, 'close_time')])
+
+		self.config = None
 
 	def get_role(self, status = 1):
 		''' Returns a list of roles from the users table, defaults to returning only active roles'''
@@ -525,9 +859,37 @@ class Vaccine_Time_Log():
 		# returns the list of user objects
 		return user_sublist
 
+	def get_names_page(self, filter, after = None, limit = 50):
+		''' Returns a list of up to limit user objects with the supplied filter, ordered by name.
+			If a user object is given as after, the list starts with the user following it'''
+
+		# Starts after the given user by comparing the name and table name against theirs, so
+		# the page is read straight from the name index instead of skipping over the earlier pages
+		if after is None:
+			keyset = ""
+			keyset_values = ()
+		else:
+			keyset = "AND (last_name, first_name, table_name) > (?, ?, ?)"
+			keyset_values = (after.last_name, after.first_name, after.table_name)
+
+		# Retrieves the page of names from the table
+		name_list = self.cursor.execute('''SELECT table_name, first_name, last_name, email
+											FROM users
+											WHERE ({}) {}
+											ORDER BY last_name, first_name, table_name
+											LIMIT ?'''.format(filter, keyset), keyset_values + (limit,)).fetchall()
+
+		return [User(table_name, first, last, email) for table_name, first, last, email in name_list]
+
 	def check_in(self, table_name, work_date, in_time, out_time):
 		''' Takes the table_name of the user, the date, and the in and out times and
-			logs the times into the users log and updates the users total hours in the users table'''
+			logs the times into the users log and updates the users total hours in the users table.
+			Returns False without logging the shift if it overlaps a shift already in the users log
+			or the users open shift'''
+
+		# Checks that the shift does not overlap or duplicate a logged shift or the open shift
+		if self.find_overlap(table_name, work_date, in_time, out_time) is not None or self.overlaps_open_shift(table_name, work_date, in_time, out_time):
+			return False
 
 		# Finds the length of the shift
 		time_difference = self.get_difference(in_time, out_time)
@@ -537,6 +899,193 @@ class Vaccine_Time_Log():
 
 		# Updates the users table with the number of hours worked
 		self.cursor.execute("UPDATE users SET life_time_total = life_time_total + ? WHERE table_name = ?", (time_difference, table_name))
+		return True
+
+	def find_overlap(self, table_name, work_date, in_time, out_time):
+		''' Returns the in and out time of a shift in the users log that overlaps the given shift
+			or None if there is no overlap. Uses the shift index so only the shifts for that date are checked.
+			A shift with the same in and out time also counts as an overlap, so zero length shifts that are
+			logged twice are caught'''
+
+		return self.cursor.execute('''SELECT in_time, out_time
+										FROM "{}"
+										WHERE date = ? AND ((in_time < ? AND out_time > ?) OR (in_time = ? AND out_time = ?))
+										LIMIT 1'''.format(table_name), (work_date, out_time, in_time, in_time, out_time)).fetchone()
+
+	def overlaps_open_shift(self, table_name, work_date, in_time, out_time):
+		''' Returns True if the given shift overlaps the users open shift. The open shift is treated as
+			running from its in time onward, so the shift logged when the user clocks out cannot overlap'''
+
+		open_shift = self.get_open_shift(table_name)
+
+		# Only a shift on the same date as the open shift can overlap it
+		if open_shift is None or open_shift[0] != "{}".format(work_date):
+			return False
+
+		# The shift overlaps if it ends after the open shift starts, or is a zero length shift at the same time
+		open_in = open_shift[1]
+		return out_time > open_in or in_time == out_time == open_in
+
+	def find_overlaps(self):
+		''' Returns a list of every pair of overlapping shifts in the database as tuples of
+			last name, first name, date, in and out time of the first shift, and in and out time of the second shift'''
+
+		overlaps = []
+
+		# retrieves the list of users that have a log table
+		users_data = self.cursor.execute('''SELECT first_name, last_name, table_name
+											FROM users
+											WHERE table_name IN (SELECT name FROM sqlite_master WHERE type = 'table')
+											ORDER BY last_name, first_name''').fetchall()
+
+		for first_name, last_name, table_name in users_data:
+
+		# Tracks the shifts on the current date that have not ended by the start of the current shift
+			last_date, active = None, []
+
+		# Steps through the users log in date and in time order (read from the shift index)
+			for work_date, in_time, out_time in self.cursor.execute('''SELECT date, in_time, out_time
+																		FROM "{}"
+																		ORDER BY date, in_time, out_time'''.format(table_name)).fetchall():
+
+		# Starts a new set of shifts on a new date, otherwise drops the shifts that ended before this one started,
+		# keeping any shift with the same in and out time as this one as a duplicate
+				if work_date != last_date:
+					last_date, active = work_date, []
+				else:
+					active = [(a_in, a_out) for a_in, a_out in active if a_out > in_time or (a_in, a_out) == (in_time, out_time)]
+
+		# Each remaining shift overlaps the current shift
+				for a_in, a_out in active:
+					overlaps += [(last_name, first_name, work_date, a_in, a_out, in_time, out_time)]
+
+				active += [(in_time, out_time)]
+
+		return overlaps
+
+	def export_overlaps(self):
+		''' Called to export a list of all overlapping shifts in the database for review'''
+
+		overlaps = self.find_overlaps()
+
+		# Asks where to save the list
+		with asksaveasfile(mode = 'w', defaultextension = '.txt') as file:
+
+		# Writes the header for the file.
+			file.write("Last Name\tFirst Name\tDate\tIn\tOut\tOverlapping In\tOverlapping Out\n")
+
+		# Writes each overlapping pair of shifts to the file
+			for overlap in overlaps:
+				file.write("{}\t{}\t{}\t{}\t{}\t{}\t{}\n".format(*overlap))
+
+		# Finally, writes the number of overlaps to the bottom of the sheet
+			file.write("\nOverlapping Shifts\t{}".format(len(overlaps)))
+
+	def clock_in(self, table_name, work_date, in_time):
+		''' Takes the table_name of the user, the date and the in time and opens a shift for the user.
+			Returns False if the user already has an open shift or a shift logged for that date ends after the in time,
+			otherwise returns True. This keeps the open shift clear of logged shifts so it can always be closed'''
+
+		# Checks the open shifts for the user
+		if self.get_open_shift(table_name) is not None:
+			return False
+
+		# Checks for logged shifts ending after the in time (the '24:00' out time is later than any logged time),
+		# and for a zero length shift at the in time that a clock out in the same minute would duplicate
+		if self.find_overlap(table_name, work_date, in_time, '24:00') is not None or self.find_overlap(table_name, work_date, in_time, in_time) is not None:
+			return False
+
+		# Records the open shift until the user clocks out
+		self.cursor.execute("INSERT INTO open_shifts (table_name, date, in_time) VALUES (?, ?, ?)", (table_name, work_date, in_time))
+		return True
+
+	def clock_out(self, table_name, work_date, out_time, close_time):
+		''' Takes the table_name of the user, the date and the out time and closes the users open shift,
+			logging it with the check_in function. A shift opened on an earlier day is logged as ending at the
+			close time of that day. Returns False if the user has no open shift or the shift overlaps a
+			logged shift, in which case the shift is left open'''
+
+		# Retrieves the users open shift
+		open_shift = self.get_open_shift(table_name)
+
+		# If the user is not clocked in there is nothing to close
+		if open_shift is None:
+			return False
+
+		open_date, in_time = open_shift
+
+		# If the shift was opened on an earlier day, it ends at the close time of that day
+		if open_date != "{}".format(work_date):
+			out_time = close_time
+
+		# The out time is never before the in time, a shift opened after the close time is logged with no length
+		out_time = max(in_time, out_time)
+
+		# Removes the shift from the open shifts and logs it to the users table. If it cannot be logged
+		# the open shift is put back
+		self.cursor.execute("DELETE FROM open_shifts WHERE table_name = ?", (table_name,))
+		if not self.check_in(table_name, open_date, in_time, out_time):
+			self.cursor.execute("INSERT INTO open_shifts (table_name, date, in_time) VALUES (?, ?, ?)", (table_name, open_date, in_time))
+			return False
+		return True
+
+	def get_open_shift(self, table_name):
+		''' Returns the date and in time of the users open shift, or None if the user is not clocked in'''
+
+		return self.cursor.execute('''SELECT date, in_time
+										FROM open_shifts
+										WHERE table_name = ?''', (table_name,)).fetchone()
+
+	def get_open_shifts(self):
+		''' Returns a list of user objects for every user that is currently clocked in'''
+
+		# Joins the open shifts to the users table to retrieve the information for the user labels
+		name_list = self.cursor.execute('''SELECT users.table_name, first_name, last_name, email
+											FROM open_shifts JOIN users ON open_shifts.table_name = users.table_name
+											ORDER BY last_name, first_name''').fetchall()
+
+		return [User(table_name, first, last, email) for table_name, first, last, email in name_list]
+
+	def close_stale_shifts(self, before_date, close_time):
+		''' Closes all open shifts that were started before the given date, logging them as ending at the close time.
+			If a shift was opened after the close time it is logged as a zero length shift. Stale shifts that
+			overlap a logged shift are discarded, as that time is already logged. Returns a list of the shifts closed
+			and a list of the shifts discarded, as tuples of last name, first name, date, in time and out time'''
+
+		return self.close_shifts("date < ?", (before_date,), before_date, close_time, close_time)
+
+	def close_open_shifts(self, work_date, out_time, close_time):
+		''' Closes all open shifts at the end of the day. Shifts started before the given date are logged as ending
+			at the close time, and shifts started on the date are logged as ending at the out time or the close time,
+			whichever is earlier. Returns the lists of shifts closed and discarded in the same way as close_stale_shifts'''
+
+		return self.close_shifts("date <= ?", (work_date,), work_date, min(out_time, close_time), close_time)
+
+	def close_shifts(self, filter, values, work_date, out_time, close_time):
+		''' Closes the open shifts matching the supplied filter with the clock_out function and discards the ones
+			that cannot be logged. Returns the lists of shifts closed and discarded'''
+
+		# Retrieves the open shifts using the date index on the open shifts table, with the names for the report
+		open_shifts = self.cursor.execute('''SELECT open_shifts.table_name, last_name, first_name, date, in_time
+												FROM open_shifts JOIN users ON open_shifts.table_name = users.table_name
+												WHERE {}
+												ORDER BY last_name, first_name'''.format(filter), values).fetchall()
+
+		closed = []
+		discarded = []
+
+		# Closes each of the shifts, logging the out time used
+		for table_name, last_name, first_name, open_date, in_time in open_shifts:
+			shift_out = max(in_time, close_time if open_date != "{}".format(work_date) else out_time)
+			if self.clock_out(table_name, work_date, out_time, close_time):
+				closed += [(last_name, first_name, open_date, in_time, shift_out)]
+
+		# Discards the shifts that could not be logged
+			else:
+				self.cursor.execute("DELETE FROM open_shifts WHERE table_name = ?", (table_name,))
+				discarded += [(last_name, first_name, open_date, in_time, shift_out)]
+
+		return closed, discarded
 
 	def update_status(self, table_name, status):
 		''' takes the table name for a user and the status to update that user to
@@ -656,6 +1205,161 @@ class Vaccine_Time_Log():
 		# Drops the users table
 		self.cursor.execute('DROP TABLE users')
 
+		# Clears the open shifts for the dropped users
+		self.cursor.execute('DELETE FROM open_shifts')
+
+		# Gives the database a new site id, as the recreated user logs will reuse the entry numbers
+		# that make up the shift ids of the shifts already merged from this site
+		self.cursor.execute("UPDATE settings SET value = ? WHERE name = 'site_id'", (uuid.uuid4().hex,))
+		self.config = None
+
+class Time_Log_Rollup():
+	def __init__(self, path = "Vaccine_Time_Rollup"):
+		""" connects to the rollup database that the site databases are merged into, sets-up a database cursor and runs the setup method """
+
+		self.conn = sql.connect(path)
+		self.cursor = self.conn.cursor()
+		self.setup()
+
+	def setup(self):
+		'''Creates the tables for the rollup database if they do not exist:
+			sites lists each merged site with its name, file and time of the last merge,
+			merged_logs holds the last entry copied from each user log at each site, and
+			shifts holds every merged shift with the site, user and number of hours. Each shift is identified
+			by the site id, the users table name and the entry number in the users log'''
+
+		self.cursor.execute("CREATE TABLE IF NOT EXISTS sites (site_id TEXT PRIMARY KEY, site_name TEXT, path TEXT, last_merged TEXT)")
+		self.cursor.execute("CREATE TABLE IF NOT EXISTS merged_logs (site_id TEXT, table_name TEXT, last_entry INTEGER, PRIMARY KEY (site_id, table_name))")
+		self.cursor.execute("CREATE TABLE IF NOT EXISTS shifts (uid TEXT PRIMARY KEY, site_id TEXT, table_name TEXT, last_name TEXT, first_name TEXT, email TEXT, role TEXT, date TEXT, in_time TEXT, out_time TEXT, hours REAL)")
+		self.cursor.execute("CREATE INDEX IF NOT EXISTS shifts_site_user ON shifts (site_id, table_name)")
+
+	def merge(self, path):
+		''' Takes the path to a site database and copies the shifts logged since the last merge of that site
+			into the shifts table. Returns the number of shifts copied, or None if the file is missing, is not
+			a site database or has no site id, in which case nothing is copied from it'''
+
+		# Checks that the file exists, as attaching a missing file would create an empty database
+		if not os.path.isfile(path):
+			return None
+
+		# Attaches the site database so its shifts can be copied with a single statement per user log
+		self.conn.commit()
+		try:
+			self.cursor.execute("ATTACH DATABASE ? AS site", (path,))
+		except sql.DatabaseError:
+			return None
+
+		try:
+			# Retrieves the site id and name, site databases from before site ids were introduced cannot be merged
+			if self.cursor.execute("SELECT name FROM site.sqlite_master WHERE type = 'table' AND name = 'settings'").fetchone() is None:
+				return None
+			settings = dict(self.cursor.execute("SELECT name, value FROM site.settings WHERE name IN ('site_id', 'site_name')").fetchall())
+			if 'site_id' not in settings:
+				return None
+			site_id = settings['site_id']
+
+			copied = 0
+
+			# Steps through the users at the site that have a log table
+			for table_name, last_name, first_name, email, role in self.cursor.execute('''SELECT table_name, last_name, first_name, email, role
+																							FROM site.users
+																							WHERE table_name IN (SELECT name FROM site.sqlite_master WHERE type = 'table')''').fetchall():
+
+			# Retrieves the last entry copied from the users log and the last entry in the log
+				last_entry = self.cursor.execute("SELECT last_entry FROM merged_logs WHERE site_id = ? AND table_name = ?", (site_id, table_name)).fetchone()
+				last_entry = 0 if last_entry is None else last_entry[0]
+				max_entry = self.cursor.execute('SELECT MAX(entry) FROM site."{}"'.format(table_name)).fetchone()[0] or 0
+
+			# Copies the new shifts with the number of hours worked, identifying each by the site, user and entry
+				self.cursor.execute('''INSERT OR IGNORE INTO shifts (uid, site_id, table_name, last_name, first_name, email, role, date, in_time, out_time, hours)
+										SELECT ? || ':' || ? || ':' || entry, ?, ?, ?, ?, ?, ?, date, in_time, out_time,
+											(strftime('%s', out_time) - strftime('%s', in_time)) / 3600.0
+										FROM site."{}"
+										WHERE entry > ?'''.format(table_name), (site_id, table_name, site_id, table_name, last_name, first_name, email, role, last_entry))
+				copied += self.cursor.rowcount
+
+			# Records the last entry copied from the users log
+				self.cursor.execute("INSERT OR REPLACE INTO merged_logs (site_id, table_name, last_entry) VALUES (?, ?, ?)", (site_id, table_name, max_entry))
+
+			# Records the merge of the site
+			self.cursor.execute("INSERT OR REPLACE INTO sites (site_id, site_name, path, last_merged) VALUES (?, ?, ?, ?)", (site_id, settings.get('site_name', ''), path, datetime.now().isoformat(timespec = 'seconds')))
+
+			return copied
+
+		# If the file is not a database or a log could not be read, undoes anything copied from the site
+		except sql.DatabaseError:
+			self.conn.rollback()
+			return None
+
+		finally:
+			# Commits the merge and detaches the site database
+			self.conn.commit()
+			self.cursor.execute("DETACH DATABASE site")
+
+	def export_totals(self):
+		''' Called to export the number of hours for each user at each merged site in the last week, last month and all time
+			Also gives the totals for each person across all sites, for each site and for all sites'''
+
+		# Finds the date from one week ago and one month ago (30 days)
+		one_week = "{}".format(date.today() -  timedelta(7))
+		one_month = "{}".format(date.today() - timedelta(30))
+
+		# Sums the weekly, monthly and total hours for each group of shifts
+		sums = '''SUM(CASE WHEN date >= ? THEN hours ELSE 0 END),
+					SUM(CASE WHEN date >= ? THEN hours ELSE 0 END),
+					SUM(hours)'''
+
+		# Names each site by its site name, or by its site id if it has no name
+		site = "CASE WHEN sites.site_name = '' THEN sites.site_id ELSE sites.site_name END"
+
+		# Sums the hours for each user at each site
+		users_data = self.cursor.execute('''SELECT {}, last_name, first_name, {}
+											FROM shifts JOIN sites ON shifts.site_id = sites.site_id
+											GROUP BY shifts.site_id, table_name
+											ORDER BY 1, last_name, first_name'''.format(site, sums), (one_week, one_month)).fetchall()
+
+		# Sums the hours for each person across all sites, matching people at different sites by name and email
+		people_data = self.cursor.execute('''SELECT last_name, first_name, email, COUNT(DISTINCT site_id), {}
+											FROM shifts
+											GROUP BY last_name, first_name, email
+											ORDER BY last_name, first_name, email'''.format(sums), (one_week, one_month)).fetchall()
+
+		# Sums the hours for each site, grouped by the site id so sites with the same name are kept apart
+		sites_data = self.cursor.execute('''SELECT {}, {}
+											FROM shifts JOIN sites ON shifts.site_id = sites.site_id
+											GROUP BY shifts.site_id
+											ORDER BY 1'''.format(site, sums), (one_week, one_month)).fetchall()
+
+		# Sums the hours for all sites
+		total_week, total_month, total_time = self.cursor.execute("SELECT {} FROM shifts".format(sums), (one_week, one_month)).fetchone()
+
+		# Asks where to save the log
+		with asksaveasfile(mode = 'w', defaultextension = '.txt') as file:
+
+		# Writes each users data at each site to the export file
+			file.write("Site\tLast Name\tFirst Name\tWeekly Total\tMonthly Total\tTotal Hours\n")
+			for row in users_data:
+				file.write("{}\t{}\t{}\t{}\t{}\t{}\n".format(*row))
+
+		# Writes each persons totals across all sites
+			file.write("\nLast Name\tFirst Name\tEmail\tSites\tWeekly Total\tMonthly Total\tTotal Hours\n")
+			for row in people_data:
+				file.write("{}\t{}\t{}\t{}\t{}\t{}\t{}\n".format(*row))
+
+		# Writes the totals for each site
+			file.write("\nSite\tWeekly Total\tMonthly Total\tTotal Hours\n")
+			for row in sites_data:
+				file.write("{}\t{}\t{}\t{}\n".format(*row))
+
+		# Finally, writes the totals for all sites to the bottom of the sheet
+			file.write("\nWeekly Total\t{}\nMonthly total\t{}\nTotal\t{}".format(total_week or 0, total_month or 0, total_time or 0))
+
+	def close(self):
+		''' Commits all changes and closes the rollup database'''
+
+		self.conn.commit()
+		self.conn.close()
+
 class User():
 	def __init__(self, table_name, first_name, last_name, email):
 		''' Takes the table name, first name, last name, and email for a user
@@ -717,18 +1421,71 @@ class Drop_Down_Selection():
 
 		return self.entry.get()
 
-class Time_Entry():
-	def __init__(self, container, row, column, title, padding = (5,5)):
-		''' Creates a group with a label and two spinboxes to select the hours and minutes
-			This grouping is created in a given container at a given row and column with a supplied padding
-			around the label'''
+class Virtual_List():
+	def __init__(self, container, row, column, fetch, height = 10, page_size = 50):
+		''' Creates a scrolling list of users inside a given container at a given row and column.
+			fetch is called with the last loaded user and the page size to retrieve the next page of users,
+			which is only done once the list is scrolled near the end of the loaded users'''
+
+		self.page_size = page_size
+
+		# Creates a frame for the list and scrollbar
+		self.frame = tk.Frame(container)
+		self.frame.grid(row = row, column = column, columnspan = 2, pady = 5)
+
+		# Creates the list box and scrollbar. The list box only draws the rows in view,
+		# so the number of loaded users does not slow it down
+		self.list_box = tk.Listbox(self.frame, height = height, width = 33, exportselection = False)
+		self.scrollbar = tk.Scrollbar(self.frame, command = self.list_box.yview)
+		self.list_box.configure(yscrollcommand = self.scrolled)
 
-		# Creates the hours in military time. The hours start at 8 and end at 7
-		hours = ('08', '09', '10', '11', '12', '13', '14', '15', '16', '17', '18', '19', '20', '21', '22', '23', '00', '01', '02', '03', '04', '05', '06', '07')
+		# Places the list box and scrollbar
+		self.list_box.grid(row = 0, column = 0)
+		self.scrollbar.grid(row = 0, column = 1, stick = "ns")
 
-		# Creates a list of minutes. Decided to do 15 minute increments for speed of check-in.
-		# This could be updated if finer control was needed
-		minutes = ('00', '15', '30', '45')
+		# Loads the first page of users
+		self.reset(fetch)
+
+	def reset(self, fetch):
+		''' Clears the list and loads the first page of users from the given fetch function'''
+
+		self.fetch = fetch
+		self.users = []
+		self.complete = False
+		self.list_box.delete(0, 'end')
+		self.load_page()
+
+	def load_page(self):
+		''' Fetches the page of users following the last loaded user and adds them to the list'''
+
+		page = self.fetch(self.users[-1] if len(self.users) > 0 else None, self.page_size)
+		self.users += page
+		self.list_box.insert('end', *[i.get_label() for i in page])
+
+		# A short page means there are no more users to fetch
+		if len(page) < self.page_size:
+			self.complete = True
+
+	def scrolled(self, first, last):
+		''' Called when the list box is scrolled. Updates the scrollbar and loads the next page
+			of users when the bottom of the view is close to the end of the loaded users'''
+
+		self.scrollbar.set(first, last)
+
+		if not self.complete and float(last) >= 0.9:
+			self.load_page()
+
+	def get_selected(self):
+		''' Returns the selected user object, or None if no user is selected'''
+
+		selection = self.list_box.curselection()
+		return self.users[selection[0]] if len(selection) > 0 else None
+
+class Time_Entry():
+	def __init__(self, container, row, column, title, hours, minutes, padding = (5,5)):
+		''' Creates a group with a label and two spinboxes to select the hours and minutes
+			This grouping is created in a given container at a given row and column with the supplied
+			hours and minutes and a supplied padding around the label'''
 
 		# Creates a label for the group
 		self.label = tk.Label(container, text = title).grid(row = row, column = column, padx = padding, stick = "w")